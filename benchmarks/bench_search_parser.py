@@ -0,0 +1,137 @@
+"""
+Micro-benchmark: streaming search result parser vs whole-page regex extraction.
+
+    python benchmarks/bench_search_parser.py [--pages DIR] [--repeat N]
+
+Both sides return the same results: the regexes tolerate the attribute order DuckDuckGo actually
+serves (rel/class before href) and inline tags in titles, and Udemy links are reduced to one result
+per course page like the parser does. The original search_web/search_udemy_courses patterns did
+neither, so they missed or duplicated results on real pages.
+
+DIR may hold recorded DuckDuckGo HTML pages (*.html). Without it, pages are generated: result blocks
+with href first, the same blocks in DuckDuckGo's attribute order, and growing pages of result titles
+without snippets, where the nested lazy DOTALL web regex backtracks super-linearly while the
+streaming parser stays linear. Udemy pages are small and already parsed with a single regex, so
+udemy mode is expected to be on par, not faster.
+"""
+
+import argparse
+import glob
+import html
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app import SearchResultStreamParser, SEARCH_STREAM_CHUNK_CHARS, canonical_udemy_course_url, _looks_like_url  # noqa: E402
+
+
+def clean_text(text):
+    return re.sub(r'\s+', ' ', html.unescape(re.sub(r'<[^>]*>', '', text))).strip()
+
+
+def regex_web_results(html_content, max_results):
+    """search_web extraction with a regex"""
+    result_pattern = (
+        r'<h2 class="result__title">.*?<a [^>]*?href="([^"]+)"[^>]*>(.*?)</a>'
+        r'.*?<a [^>]*?class="result__snippet"[^>]*>(.*?)</a>'
+    )
+    matches = re.findall(result_pattern, html_content, re.DOTALL)
+    return [
+        {'title': clean_text(title), 'url': html.unescape(url), 'snippet': clean_text(snippet)}
+        for url, title, snippet in matches[:max_results]
+    ]
+
+
+def regex_udemy_results(html_content, max_results):
+    """search_udemy_courses extraction with a regex, one result per course page"""
+    courses = {}
+    for href, text in re.findall(r'<a [^>]*?href="([^"]*udemy\.com[^"]*)"[^>]*>(.*?)</a>', html_content, re.DOTALL):
+        url = canonical_udemy_course_url(html.unescape(href))
+        text = clean_text(text)
+        if not url or not text:
+            continue
+        course = courses.get(url)
+        if course is None:
+            courses[url] = {'title': text, 'url': url, 'snippet': f"Udemy course: {text}"}
+            if len(courses) == max_results:
+                break
+        elif _looks_like_url(course['title']) and not _looks_like_url(text):
+            course['title'] = text
+        elif course['snippet'].startswith("Udemy course: ") and not _looks_like_url(text) and text != course['title']:
+            course['snippet'] = text
+    return list(courses.values())
+
+
+def streaming_results(html_content, mode, max_results):
+    parser = SearchResultStreamParser(mode, max_results)
+    for start in range(0, len(html_content), SEARCH_STREAM_CHUNK_CHARS):
+        parser.feed(html_content[start:start + SEARCH_STREAM_CHUNK_CHARS])
+        if parser.done:
+            break
+    return parser.results
+
+
+def generated_page(results=30, padding=400, anchor_attributes=""):
+    filler = "<div class=\"nav\">" + "<span>menu item</span>" * padding + "</div>"
+    blocks = []
+    for i in range(results):
+        blocks.append(
+            f'<div class="result results_links web-result"><div class="links_main">'
+            f'<h2 class="result__title"><a {anchor_attributes}href="https://www.udemy.com/course/python-{i}/?a=1&amp;b=2">'
+            f'Python Course {i} - Udemy</a></h2>'
+            f'<a class="result__snippet" href="https://www.udemy.com/course/python-{i}/">'
+            f'Learn Python step by step, course {i}.</a></div></div>'
+        )
+    return f"<html><head><title>python course</title></head><body>{filler}{''.join(blocks)}{filler}</body></html>"
+
+
+def titles_without_snippets_page(titles):
+    return "<html><body>" + '<h2 class="result__title"><a href="x">t</a></h2>' * titles + "</body></html>"
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="Directory of recorded DuckDuckGo HTML pages")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(args.pages, "*.html"))):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages.append((os.path.basename(path), f.read(), args.repeat))
+    else:
+        pages = [
+            ("regex_markup_30", generated_page(), args.repeat),
+            ("regex_markup_100", generated_page(results=100, padding=2000), args.repeat),
+            ("ddg_markup_30", generated_page(anchor_attributes='rel="nofollow" class="result__a" '), args.repeat)
+        ]
+        # The regex path needs seconds per run from ~100 titles on, so these run once
+        pages += [(f"titles_only_{titles}", titles_without_snippets_page(titles), 1) for titles in (25, 50, 100)]
+
+    print(f"{'page':<22}{'mode':<7}{'KB':>7}{'regex ms':>11}{'stream ms':>11}{'speedup':>10}  same results")
+    for name, page, repeat in pages:
+        for mode, regex_parse, max_results in (("web", regex_web_results, 5), ("udemy", regex_udemy_results, 10)):
+            regex_time = best_of(lambda: regex_parse(page, max_results), repeat)
+            stream_time = best_of(lambda: streaming_results(page, mode, max_results), repeat)
+            same = regex_parse(page, max_results) == streaming_results(page, mode, max_results)
+            print(
+                f"{name:<22}{mode:<7}{len(page) / 1024:>7.1f}{regex_time * 1000:>11.2f}"
+                f"{stream_time * 1000:>11.3f}{regex_time / stream_time:>9.1f}x  {same}"
+            )
+
+
+if __name__ == "__main__":
+    main()
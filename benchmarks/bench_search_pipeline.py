@@ -0,0 +1,125 @@
+"""
+Search pipeline benchmark against the local DuckDuckGo stand-in.
+
+    python benchmarks/bench_search_pipeline.py [--ops 200] [--concurrency 1 8 32] [--latency-ms 300]
+                                               [--jitter-ms 100] [--error-rate 0.0] [--page-kb 0]
+                                               [--bandwidth-kbps 0] [--warm] [--rate-limit]
+
+Drives search_web, search_udemy_courses and generate_udemy_courses through the real agents,
+pooled HTTP client, caches and parser, and reports throughput and latency percentiles per
+scenario and concurrency. generate_udemy_courses uses skills the fixture Udemy page covers, so
+the upstream column shows how many queries batching saves (UDEMY_SEARCH_BATCH_SIZE=1 to compare).
+Each op uses a fresh query so it reaches the stand-in; --warm repeats a small set of queries
+instead, to measure the cached path. The search rate limiter and host
+backoff are relaxed unless --rate-limit is given, so the numbers show the pipeline and not the
+politeness settings.
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ddg_standin import DuckDuckGoStandIn  # noqa: E402
+
+WARM_QUERIES = 8
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def run_scenario(operation, ops, concurrency, warm):
+    """Run operation(i) ops times on concurrency threads; returns (wall seconds, latencies, empty results)"""
+    def timed(i):
+        start = time.perf_counter()
+        result = operation(i % WARM_QUERIES if warm else i)
+        return time.perf_counter() - start, not result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, range(ops)))
+    wall = time.perf_counter() - start
+    return wall, sorted(latency for latency, _ in outcomes), sum(empty for _, empty in outcomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--page-kb", type=float, default=0)
+    parser.add_argument("--bandwidth-kbps", type=float, default=0)
+    parser.add_argument("--fixtures", help="Directory of recorded pages (see ddg_standin.py --record)")
+    parser.add_argument("--warm", action="store_true", help="Repeat a few queries to measure cache hits")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the app's search rate limit and backoff")
+    args = parser.parse_args()
+
+    standin_options = {"fixtures_dir": args.fixtures} if args.fixtures else {}
+    standin = DuckDuckGoStandIn(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        page_kb=args.page_kb, bandwidth_kbps=args.bandwidth_kbps, **standin_options
+    ).start()
+
+    # app reads its configuration at import time
+    workdir = tempfile.mkdtemp(prefix="bench_search_")
+    os.environ.update({
+        "DUCKDUCKGO_HTML_URL": standin.url,
+        "LLM_BACKEND": "offline",
+        "UDEMY_COURSE_SOURCE": "web",
+        "SEARCH_CACHE_PATH": os.path.join(workdir, "search.sqlite3"),
+        "HTTP_MAX_CONNECTIONS_PER_HOST": str(max(args.concurrency))
+    })
+    if not args.rate_limit:
+        os.environ.update({"SEARCH_RATE_LIMIT_PER_SECOND": "1000000", "SEARCH_RATE_LIMIT_BURST": "1000000",
+                           "SEARCH_BACKOFF_BASE_SECONDS": "0"})
+    import app
+
+    search_agent = app.get_search_agent()
+    udemy_agent = app.get_udemy_agent()
+    run_id = int(time.time())
+    scenarios = [
+        ("search_web", lambda i: search_agent.search_web(f"learn python {run_id} {i}", 5)),
+        ("search_udemy_courses", lambda i: search_agent.search_udemy_courses(f"Python {run_id} {i}", "Data Analyst", 2)),
+        ("generate_udemy_courses", lambda i: udemy_agent.generate_udemy_courses(
+            [f"Python {run_id} {i}", f"Data Science {run_id} {i}", f"Automation {run_id} {i}"], "Data Analyst"
+        )),
+    ]
+
+    print(
+        f"Stand-in: {args.latency_ms:g}±{args.jitter_ms:g} ms, error rate {args.error_rate:g}, "
+        f"pages {len(standin.pages['web']) / 1024:.1f} KB, {'warm' if args.warm else 'cold'} cache"
+    )
+    print(f"{'scenario':<24}{'conc':>5}{'ops':>6}{'ops/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'empty':>7}{'upstream':>10}")
+    for name, operation in scenarios:
+        for concurrency in args.concurrency:
+            if args.warm:
+                for i in range(WARM_QUERIES):
+                    operation(i)
+            before = standin.stats()["requests"]
+            wall, latencies, empty = run_scenario(operation, args.ops, concurrency, args.warm)
+            upstream = standin.stats()["requests"] - before
+            print(
+                f"{name:<24}{concurrency:>5}{args.ops:>6}{args.ops / wall:>9.1f}"
+                f"{percentile(latencies, 0.50) * 1000:>9.1f}{percentile(latencies, 0.90) * 1000:>9.1f}"
+                f"{percentile(latencies, 0.99) * 1000:>9.1f}{latencies[-1] * 1000:>9.1f}{empty:>7}{upstream:>10}"
+            )
+            run_id += 1  # Fresh queries for the next concurrency level
+
+    standin.stop()
+
+
+if __name__ == "__main__":
+    main()
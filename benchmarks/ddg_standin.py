@@ -0,0 +1,188 @@
+"""
+Local stand-in for the DuckDuckGo endpoints AISearchAgent calls, replaying recorded pages.
+
+    python benchmarks/ddg_standin.py [--port 8765] [--latency-ms 300] [--jitter-ms 100]
+                                     [--error-rate 0.05] [--page-kb 60] [--bandwidth-kbps 0]
+    python benchmarks/ddg_standin.py --record DIR QUERY...
+
+Then run the app against it with DUCKDUCKGO_HTML_URL=http://127.0.0.1:8765/html.
+
+Routing follows what the agent sends to /html: format=json gets the instant answer JSON,
+"site:udemy.com" queries get the Udemy results page, anything else the web results page.
+Queries containing one of the --empty-terms get the "No results." page. --page-kb pads pages
+with header markup ahead of the results, the way real result pages lead with forms and scripts.
+--record saves live pages for the given queries into DIR so they can be replayed with --fixtures.
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "ddg")
+CHUNK_BYTES = 8192
+
+
+class DuckDuckGoStandIn:
+    """Threaded HTTP server replaying fixture pages with configurable latency, errors and page size"""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR, port=0, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0,
+                 page_kb=0.0, bandwidth_kbps=0.0, empty_terms=("qzxv",), seed=1):
+        self.pages = {}
+        for name, filename in (("web", "web.html"), ("udemy", "udemy.html"), ("empty", "empty.html"), ("json", "instant_answer.json")):
+            path = os.path.join(fixtures_dir, filename)
+            if not os.path.exists(path):
+                path = os.path.join(FIXTURES_DIR, filename)  # A recording may only cover some pages
+            with open(path, "rb") as f:
+                self.pages[name] = f.read() if name == "json" else self._pad(f.read(), page_kb)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.bandwidth_kbps = bandwidth_kbps
+        self.empty_terms = tuple(term.lower() for term in empty_terms)
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @staticmethod
+    def _pad(page, page_kb):
+        missing = int(page_kb * 1024) - len(page)
+        if missing <= 0:
+            return page
+        filler = b'<div class="header__nav"><span class="nav-item">menu</span></div>\n'
+        padding = filler * (missing // len(filler) + 1)
+        body = page.index(b"<body>") + len(b"<body>")
+        return page[:body] + padding[:missing] + page[body:]
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/html"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ddg-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors}
+
+    def _respond(self, query):
+        """(status, content type, body) for a query string, plus the delay before the first byte"""
+        with self._lock:
+            self.requests += 1
+            fail = self._random.random() < self.error_rate
+            delay = max(0.0, self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            if fail:
+                self.errors += 1
+        if fail:
+            return 503, "text/html", b"<html><body>Service Unavailable</body></html>", delay
+        params = parse_qs(query)
+        q = params.get("q", [""])[0].lower()
+        if params.get("format") == ["json"]:
+            return 200, "application/x-javascript", self.pages["json"], delay
+        if any(term in q for term in self.empty_terms):
+            return 200, "text/html; charset=UTF-8", self.pages["empty"], delay
+        page = "udemy" if q.startswith("site:udemy.com") else "web"
+        return 200, "text/html; charset=UTF-8", self.pages[page], delay
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path.rstrip("/") != "/html":
+                    self.send_error(404)
+                    return
+                status, content_type, body, delay = standin._respond(parsed.query)
+                time.sleep(delay)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    for start in range(0, len(body), CHUNK_BYTES):
+                        self.wfile.write(body[start:start + CHUNK_BYTES])
+                        if standin.bandwidth_kbps:
+                            time.sleep(CHUNK_BYTES / 1024 / standin.bandwidth_kbps)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The agent stops reading once it has enough results
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def record(directory, queries):
+    """Save live DuckDuckGo result pages for the queries into directory"""
+    import requests
+
+    os.makedirs(directory, exist_ok=True)
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
+    for query in queries:
+        response = requests.get("https://html.duckduckgo.com/html/", params={"q": query, "kl": "us-en"}, headers=headers, timeout=15)
+        response.raise_for_status()
+        name = "udemy" if query.lower().startswith("site:udemy.com") else "web"
+        path = os.path.join(directory, f"{name}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(response.text)
+        print(f"Saved {len(response.text) / 1024:.1f} KB for {query!r} to {path}")
+        time.sleep(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--page-kb", type=float, default=0)
+    parser.add_argument("--bandwidth-kbps", type=float, default=0, help="0 sends pages at full speed")
+    parser.add_argument("--empty-terms", nargs="*", default=["qzxv"])
+    parser.add_argument("--record", metavar="DIR", help="Record live pages for the queries given as arguments")
+    parser.add_argument("queries", nargs="*")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.queries)
+        return
+
+    standin = DuckDuckGoStandIn(
+        args.fixtures, args.port, args.latency_ms, args.jitter_ms, args.error_rate,
+        args.page_kb, args.bandwidth_kbps, args.empty_terms
+    ).start()
+    print(f"DuckDuckGo stand-in on {standin.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(60)
+            print(json.dumps(standin.stats()))
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# app reads its configuration at import time
+_workdir = tempfile.mkdtemp(prefix="lnd_tests_")
+os.environ.setdefault("LLM_BACKEND", "offline")
+os.environ.setdefault("SEARCH_WARMER_ENABLED", "0")
+os.environ.setdefault("SEARCH_CACHE_PATH", os.path.join(_workdir, "search.sqlite3"))
+os.environ.setdefault("LEARNING_PATH_CACHE_PATH", os.path.join(_workdir, "paths.sqlite3"))
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks"))
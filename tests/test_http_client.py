@@ -0,0 +1,135 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import app
+
+
+class StatusServer:
+    """Answers every GET with one status after a delay, counting requests"""
+
+    def __init__(self, status, headers=(), delay=0.0):
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(delay)
+                body = b"<html><body>busy</body></html>"
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_port}/html"
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+
+    def start(*args, **kwargs):
+        servers.append(StatusServer(*args, **kwargs))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def test_429_is_left_to_host_backoff(server_factory):
+    server = server_factory(429, headers=[("Retry-After", "4")])
+    backoff = app.HostBackoff(base_seconds=1, max_seconds=60)
+    agent = app.AISearchAgent(http_client=app.PooledHTTPClient(backoff=backoff), base_url=server.url)
+
+    start = time.monotonic()
+    results = agent.search_web(f"python {time.time()}", deadline=app.RequestDeadline(3))
+    assert results == []
+    assert time.monotonic() - start < 1.5
+    assert server.requests == 1
+    assert backoff.stats()["backing_off"]["127.0.0.1"] > 3
+
+
+def test_retries_stop_at_the_request_timeout(server_factory):
+    server = server_factory(503, delay=0.6)
+    client = app.PooledHTTPClient()
+
+    response = client.session.get(server.url, timeout=1.0)
+    assert response.status_code == 503
+    assert server.requests == 2  # Without the deadline urllib3 makes HTTP_RETRY_TOTAL + 1 attempts
+
+
+def test_rate_limit_wait_fails_fast_past_the_request_timeout(server_factory):
+    server = server_factory(200)
+    limiter = app.HostRateLimiter(rate=1, burst=1, max_wait=10)
+    client = app.PooledHTTPClient(rate_limiter=limiter)
+    client.session.get(server.url, timeout=5)
+
+    start = time.monotonic()
+    with pytest.raises(app.RateLimitExceeded):
+        client.session.get(server.url, timeout=0.3)
+    assert time.monotonic() - start < 0.2
+    assert server.requests == 1
+
+    # The rejected request booked no slot, so a caller with time to wait gets the next one
+    assert client.session.get(server.url, timeout=5).status_code == 200
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_timeout_cut_short_by_the_budget_is_not_held_against_the_query_or_host(server_factory):
+    server = server_factory(200, delay=1.6)
+    backoff = app.HostBackoff(base_seconds=5, max_seconds=60)
+    agent = app.AISearchAgent(http_client=app.PooledHTTPClient(backoff=backoff), base_url=server.url)
+    query = f"python {time.time()}"
+
+    assert agent.search_web(query, deadline=app.RequestDeadline(1.3)) == []
+    assert backoff.stats()["backing_off"] == {}
+
+    start = time.monotonic()
+    agent.search_web(query, deadline=app.RequestDeadline(30))
+    assert time.monotonic() - start > 1.5  # Fetched again instead of answering from the negative cache
+    assert server.requests == 2
+
+
+def test_full_length_timeout_still_backs_off(server_factory):
+    server = server_factory(200, delay=1.0)
+    backoff = app.HostBackoff(base_seconds=5, max_seconds=60)
+    client = app.PooledHTTPClient(backoff=backoff)
+
+    with pytest.raises(requests.RequestException) as error:
+        client.session.get(server.url, timeout=0.3)
+    assert not isinstance(error.value, app.SearchDeadlineExceeded)
+    assert "127.0.0.1" in backoff.stats()["backing_off"]
+
+
+def test_joining_an_in_flight_search_respects_the_callers_deadline(server_factory):
+    server = server_factory(200, delay=3)
+    agent = app.AISearchAgent(http_client=app.PooledHTTPClient(), base_url=server.url)
+    query = f"python {time.time()}"
+    leader = threading.Thread(target=agent.search_web, args=(query,), kwargs={"deadline": app.RequestDeadline(20)})
+    leader.start()
+    time.sleep(0.3)
+
+    start = time.monotonic()
+    assert agent.search_web(query, deadline=app.RequestDeadline(1.5)) == []
+    assert time.monotonic() - start < 1.8
+    assert server.requests == 1
+    leader.join()
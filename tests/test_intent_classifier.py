@@ -0,0 +1,52 @@
+import pytest
+
+import app
+
+
+def classify(message, has_learning_path=True):
+    return app.classify_intent_locally(message, {}, has_learning_path)
+
+
+def is_fast_path(result):
+    return result is not None and result["confidence"] >= app.FAST_INTENT_CONFIDENCE_THRESHOLD
+
+
+@pytest.mark.parametrize("message", [
+    "I already know SQL, add Python",
+    "Don't remove Python",
+    "Add Python but skip the basics",
+    "I know nothing about Python, teach me",
+])
+def test_mixed_or_negated_requests_go_to_gemini(message):
+    result = classify(message)
+    assert not is_fast_path(result)
+    if result is not None:
+        assert result["action_required"] != "remove_courses"
+        assert result["extracted_info"]["skills_to_remove"] == []
+
+
+def test_remove_resolves_locally_with_a_learning_path():
+    result = classify("I already know SQL")
+    assert is_fast_path(result)
+    assert result["action_required"] == "remove_courses"
+    assert result["extracted_info"]["skills_to_remove"] == ["SQL"]
+
+
+def test_remove_is_not_resolved_locally_without_a_learning_path():
+    result = classify("I already know SQL", has_learning_path=False)
+    assert not is_fast_path(result)
+
+
+def test_cue_only_claims_skills_in_its_clause():
+    result = classify("I already know SQL. Python looks interesting")
+    assert result["extracted_info"]["skills_to_remove"] == ["SQL"]
+
+    result = classify("Add Python. My team uses SQL")
+    assert result["action_required"] == "add_courses"
+    assert result["extracted_info"]["skills_to_add"] == ["Python"]
+
+
+def test_add_request_resolves_locally():
+    result = classify("Please add Machine Learning")
+    assert is_fast_path(result)
+    assert result["extracted_info"]["skills_to_add"] == ["Machine Learning"]
@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+
+
+class StreamFailsMidwayBackend(app.OfflineLLMBackend):
+    """Streams the offline answer up to the end of its first course, then drops the connection"""
+
+    def __init__(self):
+        super().__init__(latency_ms=0, jitter_ms=0)
+
+    def stream(self, prompt, generation_config, task):
+        text = self._respond(prompt, task)
+        yield text[:text.index("}") + 1]
+        raise ConnectionError("stream dropped")
+
+
+def test_fallback_path_replaces_the_streamed_preview(monkeypatch):
+    backend = app.ResilientLLMBackend(
+        StreamFailsMidwayBackend(), app.CircuitBreaker(5, 30), app.LLMCallStats(), ThreadPoolExecutor(max_workers=4)
+    )
+    monkeypatch.setattr(app, "get_llm_backend", lambda: backend)
+    monkeypatch.setattr(app, "get_udemy_agent", lambda: app.UdemyCourseAgent(web_search=False))
+
+    calls = []
+    preview = []
+
+    def on_course(course):
+        calls.append(course)
+        if course is None:
+            preview.clear()
+        else:
+            preview.append(course)
+
+    employee = app.load_employee_database()["EMP123456"]
+    result = app._generate_learning_path_uncached(employee, app.LearningPreference(), on_course=on_course)
+
+    assert result["llm_fallback"] == "unavailable"
+    assert calls[0] is not None, "the stream should have shown a course before failing"
+    assert None in calls
+    assert [course["title"] for course in preview] == [course["title"] for course in result["learning_path"]]
+
+
+def test_llm_phase_times_only_llm_calls(monkeypatch):
+    monkeypatch.setattr(app, "get_udemy_agent", lambda: app.UdemyCourseAgent(web_search=False))
+    employee = app.load_employee_database()["EMP123456"]
+
+    app._generate_learning_path_uncached(employee, app.LearningPreference(), mode="local")
+    last = app.get_pipeline_timing_stats().snapshot()["last"]
+    assert "planner" in last and "llm" not in last
+
+
+def test_verbose_prompt_is_only_built_for_sampled_calls(monkeypatch):
+    backend = app.ResilientLLMBackend(
+        app.OfflineLLMBackend(latency_ms=0, jitter_ms=0), app.CircuitBreaker(5, 30), app.LLMCallStats(), ThreadPoolExecutor(max_workers=4)
+    )
+    token_stats = app.PromptTokenStats(sample_every=3)
+    built = []
+    build_verbose_path_prompt = app.build_verbose_path_prompt
+    monkeypatch.setattr(app, "get_llm_backend", lambda: backend)
+    monkeypatch.setattr(app, "get_udemy_agent", lambda: app.UdemyCourseAgent(web_search=False))
+    monkeypatch.setattr(app, "get_prompt_token_stats", lambda: token_stats)
+    monkeypatch.setattr(app, "build_verbose_path_prompt", lambda *args: built.append(1) or build_verbose_path_prompt(*args))
+    monkeypatch.setattr(app, "LEARNING_PATH_PROMPT_MODE", "compact")
+
+    employee = app.load_employee_database()["EMP123456"]
+    for _ in range(4):
+        app._generate_learning_path_uncached(employee, app.LearningPreference())
+
+    snapshot = token_stats.snapshot()
+    assert (snapshot["calls"], snapshot["sampled_calls"], len(built)) == (4, 2, 2)
+    assert snapshot["input_tokens_saved"] > 0
@@ -0,0 +1,115 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app
+
+
+class HangingBackend(app.LLMBackend):
+    name = "hanging"
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def generate(self, prompt, generation_config, task):
+        self.release.wait(5)
+        return "{}"
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setattr(app, "LLM_ATTEMPT_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(app, "LLM_MAX_RETRIES", 0)
+    hanging = HangingBackend()
+    breaker = app.CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    resilient = app.ResilientLLMBackend(hanging, breaker, app.LLMCallStats(), ThreadPoolExecutor(max_workers=8))
+    yield resilient
+    hanging.release.set()
+
+
+def open_breaker_until_half_open(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    time.sleep(breaker.reset_seconds + 0.01)
+
+
+def test_full_length_timeouts_trip_the_breaker(backend):
+    # Each attempt gets its full timeout, even though less than that is left of the budget afterwards
+    for _ in range(2):
+        with pytest.raises(app.LLMUnavailableError):
+            backend.generate("prompt", {}, app.LLM_TASK_INTENT, deadline=app.RequestDeadline(0.3))
+    assert backend.breaker.state == "open"
+
+
+def test_half_open_trial_cut_short_by_the_budget_does_not_stick(backend):
+    open_breaker_until_half_open(backend.breaker)
+    with pytest.raises(app.LLMUnavailableError):
+        backend.generate("prompt", {}, app.LLM_TASK_INTENT, deadline=app.RequestDeadline(0.1))
+    assert backend.breaker.allow()
+
+
+def test_half_open_trial_timing_out_reopens_the_breaker(backend):
+    open_breaker_until_half_open(backend.breaker)
+    with pytest.raises(app.LLMUnavailableError):
+        backend.generate("prompt", {}, app.LLM_TASK_INTENT, deadline=app.RequestDeadline(30))
+    assert backend.breaker.state == "open"
+    time.sleep(backend.breaker.reset_seconds + 0.01)
+    assert backend.breaker.allow()
+
+
+class FailingBackend(app.LLMBackend):
+    name = "failing"
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def generate(self, prompt, generation_config, task):
+        self.calls += 1
+        raise self.error
+
+
+def failing_backend(monkeypatch, error, breaker):
+    monkeypatch.setattr(app, "LLM_MAX_RETRIES", 2)
+    monkeypatch.setattr(app, "LLM_RETRY_BASE_SECONDS", 0.001)
+    failing = FailingBackend(error)
+    return failing, app.ResilientLLMBackend(failing, breaker, app.LLMCallStats(), ThreadPoolExecutor(max_workers=4))
+
+
+def test_breaker_counts_one_failure_per_call(monkeypatch):
+    failing, resilient = failing_backend(monkeypatch, ConnectionError("reset"), app.CircuitBreaker(5, 30))
+    for _ in range(2):
+        with pytest.raises(app.LLMUnavailableError):
+            resilient.generate("prompt", {}, app.LLM_TASK_INTENT)
+    assert failing.calls == 6
+    assert resilient.breaker.state == "closed"
+    assert resilient.breaker.consecutive_failures == 2
+
+
+def test_permanent_errors_are_not_retried(monkeypatch):
+    failing, resilient = failing_backend(monkeypatch, PermissionError("API key not valid"), app.CircuitBreaker(5, 30))
+    with pytest.raises(app.LLMUnavailableError):
+        resilient.generate("prompt", {}, app.LLM_TASK_INTENT)
+    assert failing.calls == 1
+    assert resilient.stats.failures == 1
+
+
+def test_retry_rejected_by_the_breaker_gives_up_as_a_failure(monkeypatch):
+    failing, resilient = failing_backend(monkeypatch, ConnectionError("reset"), app.CircuitBreaker(1, 0.05))
+    open_breaker_until_half_open(resilient.breaker)
+    with pytest.raises(app.LLMUnavailableError):
+        resilient.generate("prompt", {}, app.LLM_TASK_INTENT)
+    assert failing.calls == 1  # The half-open trial gets one attempt, its retry is refused
+    assert resilient.stats.failures == 1
+    assert resilient.breaker.state == "open"
+
+
+def test_backend_without_generate_fails_at_construction():
+    class StreamOnlyBackend(app.LLMBackend):
+        def stream(self, prompt, generation_config, task):
+            yield "{}"
+
+    with pytest.raises(TypeError):
+        StreamOnlyBackend()
@@ -0,0 +1,54 @@
+import glob
+import os
+import time
+
+import pytest
+
+from app import SearchResultStreamParser
+from bench_search_parser import regex_udemy_results, regex_web_results, streaming_results
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "fixtures", "ddg", "*.html")))
+MODES = (("web", regex_web_results, 5), ("udemy", regex_udemy_results, 10))
+
+
+def read_page(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+@pytest.mark.parametrize("mode,regex_parse,max_results", MODES, ids=[mode for mode, _, _ in MODES])
+def test_streaming_parser_matches_regex_extraction(path, mode, regex_parse, max_results):
+    page = read_page(path)
+    assert streaming_results(page, mode, max_results) == regex_parse(page, max_results)
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+@pytest.mark.parametrize("mode", ("web", "udemy"))
+@pytest.mark.parametrize("chunk_chars", (1, 7, 64))
+def test_results_do_not_depend_on_chunking(path, mode, chunk_chars):
+    page = read_page(path)
+    parser = SearchResultStreamParser(mode, 10)
+    for start in range(0, len(page), chunk_chars):
+        parser.feed(page[start:start + chunk_chars])
+    assert parser.results == streaming_results(page, mode, 10)
+
+
+def test_fixtures_have_results():
+    pages = {os.path.basename(path): read_page(path) for path in FIXTURES}
+    assert streaming_results(pages["web.html"], "web", 5)
+    assert streaming_results(pages["udemy.html"], "udemy", 10)
+
+
+@pytest.mark.parametrize("mode", ("web", "udemy"))
+@pytest.mark.parametrize("page", (
+    '<a href="https://www.udemy.com/course/python/">' * 8000,
+    '<a href="https://www.udemy.com/course/python/">Python ' + "<b>x</b>" * 40000,
+    "<a " * 40000,
+), ids=("unclosed_links", "long_link_text", "unclosed_tags"))
+def test_malformed_pages_parse_in_linear_time(mode, page):
+    parser = SearchResultStreamParser(mode, 10)
+    start = time.perf_counter()
+    for offset in range(0, len(page), 8192):
+        parser.feed(page[offset:offset + 8192])
+    assert time.perf_counter() - start < 0.5